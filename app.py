@@ -10,15 +10,22 @@ This application provides CRUD (Create, Read, Update, Delete) operations
 for inventory items with SQLite database persistence and user authentication.
 """
 
+import codecs
+import collections
+import csv
+import hashlib
+import math
 import os
+import queue
+import re
+import secrets
 import sqlite3
-import uuid
-from datetime import datetime
-from functools import wraps
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+import threading
+import time
+from flask import Flask, render_template, request, redirect, url_for, flash, session, make_response
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
+from PIL import Image, ImageOps, ImageSequence
 
 # Initialize Flask application
 app = Flask(__name__)
@@ -29,10 +36,59 @@ app.secret_key = os.environ.get('SESSION_SECRET', 'dev-secret-key')
 # Database configuration
 DATABASE = 'inventory.db'
 
+# Per-thread database connections (see get_db)
+_thread_local = threading.local()
+
+# PRAGMAs applied to every new connection: WAL lets readers run alongside
+# a writer, and NORMAL sync avoids an fsync on every commit under WAL.
+DATABASE_PRAGMAS = '''
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -20000;
+    PRAGMA mmap_size = 268435456;
+'''
+
+# Shared SQL for creating inventory items (single add and CSV import)
+INSERT_ITEM_SQL = '''
+    INSERT INTO inventory (user_id, name, quantity, price, category, image_filename)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+INSERT_ITEM_RETURNING_SQL = INSERT_ITEM_SQL + ' RETURNING id'
+MAX_QUANTITY = 2 ** 63 - 1  # Largest value an SQLite INTEGER can hold
+
+# Password hashing configuration. Lower PWHASH_ITERS only for development
+# and tests; successful logins are remembered for PWVERIFY_CACHE_TTL seconds
+# (0 disables) so repeat logins skip the PBKDF2 work.
+PASSWORD_HASH_METHOD = f"pbkdf2:sha256:{os.environ.get('PWHASH_ITERS', '600000')}"
+PASSWORD_VERIFY_CACHE_TTL = int(os.environ.get('PWVERIFY_CACHE_TTL', '300'))
+PASSWORD_VERIFY_CACHE_SIZE = 1024
+_password_verify_cache = {}
+_password_verify_lock = threading.Lock()
+
 # Image upload configuration
 UPLOAD_FOLDER = 'static/uploads'
+UPLOAD_URL_PREFIX = '/static/uploads/'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+ALLOWED_EXTENSIONS_RE = re.compile(
+    r'\.(' + '|'.join(sorted(ALLOWED_EXTENSIONS)) + r')$', re.IGNORECASE
+)
 MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5MB max file size
+IMAGE_MAX_SIZE = (1920, 1920)  # Stored images are downscaled to fit
+MAX_IMAGE_PIXELS = 40_000_000  # Larger images are rejected before decoding
+THUMBNAIL_SIZE = (256, 256)  # Thumbnails shown on listing pages
+WEBP_QUALITY = 80
+UPLOAD_CACHE_MAX_AGE = 365 * 24 * 60 * 60  # Upload names are never reused
+
+# Rendered HTML of static anonymous pages (see render_cached_page)
+_page_cache = {}
+
+# Stored images whose thumbnail could not be generated; listing pages
+# show the original for these (see create_missing_thumbnails)
+_thumbnail_fallbacks = set()
+
+# Image files are deleted by a background thread (see image_delete_worker)
+_image_delete_queue = queue.Queue()
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
@@ -68,15 +124,23 @@ def load_user(user_id):
     """
     Callback to reload user object from user ID stored in session.
     Required by Flask-Login for session management.
+    
+    Username and email are cached in the session at login, so normal
+    requests rebuild the user without a database query. Sessions restored
+    from a remember-me cookie fall back to the lookup below.
     """
-    conn = get_db_connection()
+    if 'u_name' in session and 'u_email' in session:
+        return User(int(user_id), session['u_name'], session['u_email'])
+    
+    conn = get_db()
     user_data = conn.execute(
         'SELECT id, username, email FROM users WHERE id = ?', 
         (user_id,)
     ).fetchone()
-    conn.close()
     
     if user_data:
+        session['u_name'] = user_data['username']
+        session['u_email'] = user_data['email']
         return User(user_data['id'], user_data['username'], user_data['email'])
     return None
 
@@ -85,9 +149,25 @@ def load_user(user_id):
 # DATABASE FUNCTIONS
 # ============================================================================
 
+# Lightweight row type for listing pages (dashboard and search results).
+# Attribute access on a namedtuple is cheaper than sqlite3.Row lookups.
+ListItem = collections.namedtuple(
+    'ListItem', 'id name quantity price category image_filename updated_at'
+)
+
+
+def list_item_factory(cursor, row):
+    """
+    Row factory returning ListItem tuples.
+    Queries using it must select the ListItem fields in order.
+    """
+    return ListItem._make(row)
+
+
 def get_db_connection():
     """
     Establishes a connection to the SQLite database.
+    Applies DATABASE_PRAGMAS before returning the connection.
     
     Returns:
         sqlite3.Connection: Database connection object with row factory
@@ -95,6 +175,26 @@ def get_db_connection():
     """
     conn = sqlite3.connect(DATABASE)
     conn.row_factory = sqlite3.Row
+    conn.executescript(DATABASE_PRAGMAS)
+    return conn
+
+
+def get_db():
+    """
+    Returns the database connection for the current thread.
+    
+    Each thread opens one connection on first use and keeps it for its
+    lifetime, so requests served by the same worker thread (and background
+    threads such as the image delete worker) reuse it instead of
+    reconnecting. The connection is closed when the thread exits.
+    
+    Returns:
+        sqlite3.Connection: Thread-local database connection
+    """
+    conn = getattr(_thread_local, 'conn', None)
+    if conn is None:
+        conn = get_db_connection()
+        _thread_local.conn = conn
     return conn
 
 
@@ -105,6 +205,8 @@ def init_db():
     Creates two tables:
     1. users - For storing user authentication data
     2. inventory - For storing inventory items with user ownership
+    
+    Also creates the inventory_fts full-text index used by search.
     """
     conn = get_db_connection()
     
@@ -135,10 +237,75 @@ def init_db():
         )
     ''')
     
+    # Index for per-user listings sorted by last update (index and search).
+    # Its leading user_id column also serves plain user_id filters.
+    # users.username and users.email are already indexed by UNIQUE.
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_inv_user_updated
+        ON inventory (user_id, updated_at DESC)
+    ''')
+    
+    # Image files waiting to be removed by the background delete worker.
+    # Rows are written in the same transaction that drops the reference, so
+    # deletions interrupted by a restart are picked up again at startup.
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pending_deletes (
+            filename TEXT NOT NULL
+        )
+    ''')
+    
+    # Full-text index over item name and category for search. It mirrors the
+    # inventory table through triggers; rebuild it once if it is new so
+    # items created before it existed are searchable too.
+    fts_exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'inventory_fts'"
+    ).fetchone()
+    conn.executescript('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS inventory_fts USING fts5(
+            name, category, content='inventory', content_rowid='id'
+        );
+        
+        CREATE TRIGGER IF NOT EXISTS inventory_ai AFTER INSERT ON inventory BEGIN
+            INSERT INTO inventory_fts (rowid, name, category)
+            VALUES (new.id, new.name, new.category);
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS inventory_ad AFTER DELETE ON inventory BEGIN
+            INSERT INTO inventory_fts (inventory_fts, rowid, name, category)
+            VALUES ('delete', old.id, old.name, old.category);
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS inventory_au AFTER UPDATE OF name, category ON inventory BEGIN
+            INSERT INTO inventory_fts (inventory_fts, rowid, name, category)
+            VALUES ('delete', old.id, old.name, old.category);
+            INSERT INTO inventory_fts (rowid, name, category)
+            VALUES (new.id, new.name, new.category);
+        END;
+    ''')
+    if not fts_exists:
+        conn.execute("INSERT INTO inventory_fts (inventory_fts) VALUES ('rebuild')")
+    
     conn.commit()
     conn.close()
 
 
+def bulk_insert_items(conn, rows):
+    """
+    Inserts many inventory items in a single transaction.
+    
+    Args:
+        conn: Database connection
+        rows: Iterable of (user_id, name, quantity, price, category,
+              image_filename) tuples; may be a generator
+        
+    Returns:
+        int: Number of items inserted
+    """
+    with conn:
+        cursor = conn.executemany(INSERT_ITEM_SQL, rows)
+    return cursor.rowcount
+
+
 def allowed_file(filename):
     """
     Checks if uploaded file has an allowed extension.
@@ -149,13 +316,81 @@ def allowed_file(filename):
     Returns:
         bool: True if file extension is allowed, False otherwise
     """
-    return '.' in filename and \
-           filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return bool(filename and ALLOWED_EXTENSIONS_RE.search(filename))
+
+
+def is_image_content(stream):
+    """
+    Checks the leading bytes of an upload against known image signatures.
+    
+    Args:
+        stream: File-like object positioned at the start of the upload
+        
+    Returns:
+        bool: True if the content looks like PNG, JPEG, GIF or WEBP
+    """
+    header = stream.read(12)
+    stream.seek(0)
+    return (header.startswith(b'\x89PNG\r\n\x1a\n')
+            or header.startswith(b'\xff\xd8\xff')
+            or header[:6] in (b'GIF87a', b'GIF89a')
+            or (header[:4] == b'RIFF' and header[8:12] == b'WEBP'))
+
+
+def thumbnail_filename(filename):
+    """
+    Returns the thumbnail filename for a stored image.
+    
+    Args:
+        filename: Name of the stored image
+        
+    Returns:
+        str: Name of the matching thumbnail file
+    """
+    return f"{filename.rsplit('.', 1)[0]}_thumb.webp"
+
+
+def check_image_pixels(img):
+    """
+    Rejects images whose decoded size would be too large.
+    Image.open only reads the header, so this runs before any pixel data
+    is decoded; a small compressed file can expand to gigabytes of RAM.
+    Every frame of an animated image counts towards the limit.
+    
+    Args:
+        img: Lazily opened PIL image
+        
+    Raises:
+        ValueError: If width x height x frames exceeds MAX_IMAGE_PIXELS
+    """
+    frames = getattr(img, 'n_frames', 1)
+    if img.width * img.height * frames > MAX_IMAGE_PIXELS:
+        raise ValueError(f'Image too large: {img.width}x{img.height}x{frames}')
+
+
+def normalize_image(img):
+    """
+    Applies EXIF orientation and converts an image to a WEBP-compatible mode.
+    
+    Args:
+        img: PIL image opened from an upload or stored file
+        
+    Returns:
+        Image: Image in RGB or RGBA mode
+    """
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ('RGB', 'RGBA'):
+        has_alpha = 'A' in img.getbands() or 'transparency' in img.info
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+    return img
 
 
 def save_image(file):
     """
     Saves uploaded image file with a unique filename.
+    The image is re-encoded as WEBP, downscaled to IMAGE_MAX_SIZE, and a
+    THUMBNAIL_SIZE thumbnail is saved alongside it for listing pages.
+    Animated GIF/WEBP uploads keep their animation; the thumbnail is still.
     
     Args:
         file: FileStorage object from form upload
@@ -164,47 +399,307 @@ def save_image(file):
         str: Saved filename or None if save failed
     """
     if file and file.filename and allowed_file(file.filename):
+        file.stream.seek(0)
+        if not is_image_content(file.stream):
+            return None
+        
+        # Any decode or encode failure means the upload is not a usable image
+        try:
+            img = Image.open(file.stream)
+            check_image_pixels(img)
+            if getattr(img, 'is_animated', False):
+                # Keep every frame of animated GIF/WEBP uploads
+                frames, durations = [], []
+                for frame in ImageSequence.Iterator(img):
+                    durations.append(frame.info.get('duration', 100))
+                    frame = frame.convert('RGBA')
+                    frame.thumbnail(IMAGE_MAX_SIZE)
+                    frames.append(frame)
+                save_options = {
+                    'save_all': True,
+                    'append_images': frames[1:],
+                    'duration': durations,
+                    'loop': img.info.get('loop', 0),
+                }
+                img = frames[0]
+            else:
+                # Let JPEGs decode at a reduced scale close to the target size
+                img.draft('RGB', IMAGE_MAX_SIZE)
+                img = normalize_image(img)
+                img.thumbnail(IMAGE_MAX_SIZE)
+                save_options = {}
+        except Exception:
+            return None
+        
         # Generate unique filename to prevent overwrites
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        unique_filename = f"{uuid.uuid4().hex}.{ext}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], unique_filename)
-        file.save(filepath)
+        unique_filename = f"{secrets.token_hex(16)}.webp"
+        filepath = f"{UPLOAD_FOLDER}/{unique_filename}"
+        thumb_path = f"{UPLOAD_FOLDER}/{thumbnail_filename(unique_filename)}"
+        
+        # Thumbnails are always a still image of the first frame
+        try:
+            img.save(filepath, 'WEBP', quality=WEBP_QUALITY, method=4, **save_options)
+            img = img.copy()
+            img.thumbnail(THUMBNAIL_SIZE)
+            img.save(thumb_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+        except Exception:
+            # Don't leave a main image without its thumbnail behind
+            delete_image(unique_filename)
+            return None
         return unique_filename
     return None
 
 
 def delete_image(filename):
     """
-    Deletes an image file from the uploads folder.
+    Deletes an image file and its thumbnail from the uploads folder.
     Includes error handling for filesystem operations.
     
     Args:
         filename: Name of the file to delete
     """
     if filename:
+        for name in (filename, thumbnail_filename(filename)):
+            try:
+                filepath = f"{UPLOAD_FOLDER}/{name}"
+                if os.path.exists(filepath):
+                    os.remove(filepath)
+            except OSError:
+                pass
+
+
+def schedule_image_delete(conn, filename):
+    """
+    Records an image for background deletion.
+    Must run inside the transaction that removes the image reference;
+    call queue_image_delete() once that transaction has committed.
+    
+    Args:
+        conn: Database connection with an open transaction
+        filename: Name of the image to delete
+    """
+    if filename:
+        conn.execute('INSERT INTO pending_deletes (filename) VALUES (?)', (filename,))
+
+
+def queue_image_delete(filename):
+    """
+    Hands an image to the background delete worker.
+    
+    Args:
+        filename: Name of the image to delete
+    """
+    if filename:
+        _image_delete_queue.put(filename)
+
+
+def image_delete_worker():
+    """
+    Background thread that removes queued image files from disk,
+    keeping filesystem work out of the request path.
+    """
+    conn = get_db()
+    while True:
+        filename = _image_delete_queue.get()
         try:
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            if os.path.exists(filepath):
-                os.remove(filepath)
-        except OSError:
+            delete_image(filename)
+            with conn:
+                conn.execute('DELETE FROM pending_deletes WHERE filename = ?', (filename,))
+        except sqlite3.Error:
+            # The row stays in pending_deletes and is retried on next startup
             pass
+        finally:
+            _image_delete_queue.task_done()
+
+
+def start_image_delete_worker():
+    """
+    Queues deletions left over from a previous run and starts the
+    background delete worker thread.
+    """
+    conn = get_db_connection()
+    for row in conn.execute('SELECT DISTINCT filename FROM pending_deletes'):
+        _image_delete_queue.put(row['filename'])
+    conn.close()
+    
+    threading.Thread(target=image_delete_worker, daemon=True).start()
+
+
+def create_missing_thumbnails():
+    """
+    Generates thumbnails for stored images that do not have one yet,
+    such as images uploaded before thumbnails were introduced. Runs once
+    at startup so listing pages can link the thumbnail file; images that
+    fail are logged and shown in full instead.
+    """
+    conn = get_db_connection()
+    rows = conn.execute(
+        'SELECT DISTINCT image_filename FROM inventory WHERE image_filename IS NOT NULL'
+    ).fetchall()
+    conn.close()
+    
+    for row in rows:
+        filepath = f"{UPLOAD_FOLDER}/{row['image_filename']}"
+        thumb_path = f"{UPLOAD_FOLDER}/{thumbnail_filename(row['image_filename'])}"
+        if os.path.exists(thumb_path) or not os.path.exists(filepath):
+            continue
+        try:
+            with Image.open(filepath) as img:
+                check_image_pixels(img)
+                img.draft('RGB', THUMBNAIL_SIZE)
+                img = normalize_image(img)
+                img.thumbnail(THUMBNAIL_SIZE)
+                img.save(thumb_path, 'WEBP', quality=WEBP_QUALITY, method=4)
+        except Exception as e:
+            app.logger.warning('Could not create thumbnail for %s: %s', row['image_filename'], e)
+            _thumbnail_fallbacks.add(row['image_filename'])
+
+
+def thumbnail_url_filename(filename):
+    """
+    Template filter returning the image to show on listing pages.
+    Falls back to the original for images without a thumbnail.
+    """
+    if filename in _thumbnail_fallbacks:
+        return filename
+    return thumbnail_filename(filename)
+
+
+def hash_password(password):
+    """
+    Hashes a password using the configured PBKDF2 method.
+    
+    Args:
+        password: Plain-text password
+        
+    Returns:
+        str: Werkzeug password hash string
+    """
+    return generate_password_hash(password, method=PASSWORD_HASH_METHOD)
+
+
+def verify_password(user_id, password_hash, password):
+    """
+    Checks a password against a stored hash.
+    Recently verified passwords are served from an in-memory cache keyed
+    by user, stored hash and a SHA-256 digest of the password.
+    
+    Args:
+        user_id: ID of the user logging in
+        password_hash: Stored Werkzeug password hash
+        password: Plain-text password to check
+        
+    Returns:
+        bool: True if the password matches, False otherwise
+    """
+    if PASSWORD_VERIFY_CACHE_TTL <= 0:
+        return check_password_hash(password_hash, password)
+    
+    key = (user_id, password_hash, hashlib.sha256(password.encode()).digest())
+    with _password_verify_lock:
+        expires = _password_verify_cache.get(key)
+    if expires is not None and expires > time.monotonic():
+        return True
+    
+    # Hash check runs outside the lock so logins don't serialise on it
+    if not check_password_hash(password_hash, password):
+        return False
+    
+    now = time.monotonic()
+    with _password_verify_lock:
+        if len(_password_verify_cache) >= PASSWORD_VERIFY_CACHE_SIZE:
+            # Drop expired entries first, then the oldest if still full
+            for stale in [k for k, exp in _password_verify_cache.items() if exp <= now]:
+                del _password_verify_cache[stale]
+            if len(_password_verify_cache) >= PASSWORD_VERIFY_CACHE_SIZE:
+                del _password_verify_cache[next(iter(_password_verify_cache))]
+        _password_verify_cache[key] = now + PASSWORD_VERIFY_CACHE_TTL
+    return True
+
+
+def build_search_query(query):
+    """
+    Converts user search text into an FTS5 MATCH expression.
+    Each word is quoted so punctuation cannot break the query syntax,
+    and matched as a prefix so partial words still find items.
+    
+    Args:
+        query: Search text entered by the user
+        
+    Returns:
+        str: FTS5 query matching items containing every word
+    """
+    terms = []
+    for word in query.split():
+        escaped = word.replace('"', '""')
+        terms.append(f'"{escaped}"*')
+    return ' '.join(terms)
 
 
 def format_datetime(value):
     """
     Formats a datetime string for display in templates.
+    SQLite timestamps ('YYYY-MM-DD HH:MM:SS') are sliced directly rather
+    than parsed with strptime, since this runs for every displayed row.
     """
     if value:
         try:
-            dt = datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
-            return dt.strftime('%d/%m/%Y %H:%M')
+            if len(value) != 19 or value[4] != '-' or value[7] != '-' or value[10] != ' ':
+                raise ValueError(value)
+            year, month, day = int(value[0:4]), int(value[5:7]), int(value[8:10])
+            hour, minute = int(value[11:13]), int(value[14:16])
+            return f"{day:02d}/{month:02d}/{year:04d} {hour:02d}:{minute:02d}"
         except (ValueError, TypeError):
             return value
     return ''
 
 
-# Register template filter
+# Register template filters
 app.jinja_env.filters['datetime'] = format_datetime
+app.jinja_env.filters['thumbnail'] = thumbnail_url_filename
+
+
+@app.after_request
+def cache_uploaded_images(response):
+    """
+    Lets browsers cache uploaded images indefinitely.
+    Each upload gets a new random filename and is never modified in place,
+    so a cached copy can never go stale.
+    """
+    if response.status_code in (200, 304) and request.path.startswith(UPLOAD_URL_PREFIX):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = UPLOAD_CACHE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+
+def render_cached_page(template):
+    """
+    Renders a page whose HTML depends only on its template, such as the
+    login and register forms, reusing the rendered output across requests.
+    The response carries an ETag so repeat visits can get 304 Not Modified.
+    
+    Non-GET requests, pages with pending flash messages and debug mode
+    (where templates reload) are rendered normally.
+    
+    Args:
+        template: Template name to render
+        
+    Returns:
+        Response: Rendered page
+    """
+    if request.method != 'GET' or '_flashes' in session or app.debug:
+        return render_template(template)
+    
+    html = _page_cache.get(template)
+    if html is None:
+        html = render_template(template)
+        _page_cache[template] = html
+    
+    response = make_response(html)
+    response.add_etag()
+    return response.make_conditional(request)
 
 
 # ============================================================================
@@ -242,31 +737,24 @@ def register():
                 flash(error, 'error')
             return render_template('register.html')
         
-        # Check if user already exists
-        conn = get_db_connection()
-        existing_user = conn.execute(
-            'SELECT id FROM users WHERE username = ? OR email = ?',
-            (username, email)
-        ).fetchone()
+        # Create new user with hashed password; the UNIQUE constraints on
+        # username and email turn a duplicate into a no-op returning no row
+        password_hash = hash_password(password)
+        conn = get_db()
+        with conn:
+            new_user = conn.execute('''
+                INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)
+                ON CONFLICT DO NOTHING RETURNING id
+            ''', (username, email, password_hash)).fetchone()
         
-        if existing_user:
-            conn.close()
+        if new_user is None:
             flash('Username or email already registered.', 'error')
             return render_template('register.html')
         
-        # Create new user with hashed password
-        password_hash = generate_password_hash(password)
-        conn.execute(
-            'INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?)',
-            (username, email, password_hash)
-        )
-        conn.commit()
-        conn.close()
-        
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('login'))
     
-    return render_template('register.html')
+    return render_cached_page('register.html')
 
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -287,16 +775,17 @@ def login():
             flash('Please enter username and password.', 'error')
             return render_template('login.html')
         
-        conn = get_db_connection()
+        conn = get_db()
         user_data = conn.execute(
             'SELECT id, username, email, password_hash FROM users WHERE username = ?',
             (username,)
         ).fetchone()
-        conn.close()
         
-        if user_data and check_password_hash(user_data['password_hash'], password):
+        if user_data and verify_password(user_data['id'], user_data['password_hash'], password):
             user = User(user_data['id'], user_data['username'], user_data['email'])
             login_user(user, remember=bool(remember))
+            session['u_name'] = user.username
+            session['u_email'] = user.email
             flash(f'Welcome back, {user.username}!', 'success')
             
             # Redirect to requested page or home
@@ -305,7 +794,7 @@ def login():
         
         flash('Invalid username or password.', 'error')
     
-    return render_template('login.html')
+    return render_cached_page('login.html')
 
 
 @app.route('/logout')
@@ -316,6 +805,8 @@ def logout():
     Ends user session and redirects to login.
     """
     logout_user()
+    session.pop('u_name', None)
+    session.pop('u_email', None)
     flash('You have been logged out.', 'info')
     return redirect(url_for('login'))
 
@@ -330,24 +821,28 @@ def index():
     """
     Home page route - Displays user's inventory items.
     """
-    conn = get_db_connection()
-    items = conn.execute(
-        'SELECT * FROM inventory WHERE user_id = ? ORDER BY updated_at DESC',
-        (current_user.id,)
-    ).fetchall()
-    conn.close()
+    conn = get_db()
+    cursor = conn.cursor()
+    cursor.row_factory = list_item_factory
+    items = cursor.execute('''
+        SELECT id, name, quantity, price, category, image_filename, updated_at
+        FROM inventory WHERE user_id = ? ORDER BY updated_at DESC
+    ''', (current_user.id,)).fetchall()
     
-    # Calculate summary statistics
-    total_items = len(items)
-    total_quantity = sum(item['quantity'] for item in items)
-    total_value = sum(item['quantity'] * item['price'] for item in items)
+    # Calculate summary statistics in SQL
+    totals = conn.execute('''
+        SELECT COUNT(*) AS total_items,
+               COALESCE(SUM(quantity), 0) AS total_quantity,
+               COALESCE(SUM(quantity * price), 0) AS total_value
+        FROM inventory WHERE user_id = ?
+    ''', (current_user.id,)).fetchone()
     
     return render_template(
         'index.html',
         items=items,
-        total_items=total_items,
-        total_quantity=total_quantity,
-        total_value=total_value
+        total_items=totals['total_items'],
+        total_quantity=totals['total_quantity'],
+        total_value=totals['total_value']
     )
 
 
@@ -396,38 +891,105 @@ def add_item():
                     return redirect(url_for('add_item'))
         
         # Insert new item
-        conn = get_db_connection()
-        conn.execute(
-            '''INSERT INTO inventory (user_id, name, quantity, price, category, image_filename) 
-               VALUES (?, ?, ?, ?, ?, ?)''',
-            (current_user.id, name, quantity, price, category, image_filename)
-        )
-        conn.commit()
-        conn.close()
+        conn = get_db()
+        with conn:
+            item_id = conn.execute(
+                INSERT_ITEM_RETURNING_SQL,
+                (current_user.id, name, quantity, price, category, image_filename)
+            ).fetchone()['id']
         
-        flash(f'Item "{name}" added successfully!', 'success')
+        flash(f'Item "{name}" (#{item_id}) added successfully!', 'success')
         return redirect(url_for('index'))
     
     return render_template('add.html')
 
 
+def parse_import_rows(lines, user_id):
+    """
+    Parses CSV lines into inventory rows for bulk_insert_items.
+    Columns are name, category, quantity, price; a header row is skipped.
+    
+    Args:
+        lines: Iterable of CSV text lines
+        user_id: Owner of the imported items
+        
+    Yields:
+        tuple: Row values in INSERT_ITEM_SQL parameter order
+        
+    Raises:
+        ValueError: If a row is incomplete or has invalid values
+    """
+    for line_no, row in enumerate(csv.reader(lines), start=1):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if line_no == 1 and row[0].strip().lower() == 'name':
+            continue
+        if len(row) < 4:
+            raise ValueError(f'Line {line_no}: expected name, category, quantity, price.')
+        
+        name, category = row[0].strip(), row[1].strip()
+        if not name or not category:
+            raise ValueError(f'Line {line_no}: name and category are required.')
+        try:
+            quantity = int(row[2])
+            price = float(row[3])
+        except ValueError:
+            raise ValueError(f'Line {line_no}: invalid quantity or price value.')
+        if quantity < 0 or price < 0:
+            raise ValueError(f'Line {line_no}: quantity and price cannot be negative.')
+        if quantity > MAX_QUANTITY or not math.isfinite(price):
+            raise ValueError(f'Line {line_no}: quantity or price is out of range.')
+        
+        yield (user_id, name, quantity, price, category, None)
+
+
+@app.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_items():
+    """
+    Bulk import inventory items from an uploaded CSV file.
+    All rows are inserted in one transaction, so a bad row imports nothing.
+    """
+    if request.method == 'POST':
+        file = request.files.get('csv_file')
+        if not file or not file.filename:
+            flash('Please choose a CSV file to import.', 'error')
+            return redirect(url_for('import_items'))
+        
+        # Decode lazily; the upload stream may be a SpooledTemporaryFile,
+        # which lacks the io methods TextIOWrapper needs before Python 3.11
+        lines = codecs.iterdecode(file.stream, 'utf-8-sig')
+        try:
+            count = bulk_insert_items(get_db(), parse_import_rows(lines, current_user.id))
+        except (ValueError, csv.Error) as e:
+            flash(f'Import failed: {e}', 'error')
+            return redirect(url_for('import_items'))
+        except sqlite3.Error:
+            flash('Import failed: the file could not be saved.', 'error')
+            return redirect(url_for('import_items'))
+        
+        if count == 0:
+            flash('No items found in CSV file.', 'error')
+            return redirect(url_for('import_items'))
+        
+        flash(f'Imported {count} item(s) successfully!', 'success')
+        return redirect(url_for('index'))
+    
+    return render_template('import.html')
+
+
 @app.route('/edit/<int:id>', methods=['GET', 'POST'])
 @login_required
 def edit_item(id):
     """
     Edit inventory item route - UPDATE operation.
     Supports updating or removing item image.
-    """
-    conn = get_db_connection()
-    item = conn.execute(
-        'SELECT * FROM inventory WHERE id = ? AND user_id = ?', 
-        (id, current_user.id)
-    ).fetchone()
     
-    if item is None:
-        conn.close()
-        flash('Item not found!', 'error')
-        return redirect(url_for('index'))
+    GET reads the item once to fill the form. POST validates the form
+    first and then updates the row directly; the current image filename is
+    only read when the image is being replaced or removed.
+    """
+    conn = get_db()
     
     if request.method == 'POST':
         name = request.form.get('name', '').strip()
@@ -457,41 +1019,62 @@ def edit_item(id):
             flash('Invalid quantity or price value!', 'error')
             return redirect(url_for('edit_item', id=id))
         
-        # Handle image
-        image_filename = item['image_filename']
-        
-        # Remove image if requested
-        if remove_image:
-            delete_image(image_filename)
-            image_filename = None
-        
         # Handle new image upload
+        new_image = None
         if 'image' in request.files:
             file = request.files['image']
             if file.filename:
                 new_image = save_image(file)
-                if new_image:
-                    # Delete old image
-                    delete_image(item['image_filename'])
-                    image_filename = new_image
-                else:
+                if not new_image:
                     flash('Invalid image format.', 'error')
                     return redirect(url_for('edit_item', id=id))
         
-        # Update item
-        conn.execute('''
-            UPDATE inventory 
-            SET name = ?, quantity = ?, price = ?, category = ?, 
-                image_filename = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE id = ? AND user_id = ?
-        ''', (name, quantity, price, category, image_filename, id, current_user.id))
-        conn.commit()
-        conn.close()
+        # The image changes if a new one was uploaded or removal was requested
+        replace_image = bool(new_image or remove_image)
+        
+        with conn:
+            old_image = None
+            if replace_image:
+                old_item = conn.execute(
+                    'SELECT image_filename FROM inventory WHERE id = ? AND user_id = ?',
+                    (id, current_user.id)
+                ).fetchone()
+                old_image = old_item['image_filename'] if old_item else None
+            
+            # Update item, keeping the current image unless it is replaced
+            updated = conn.execute('''
+                UPDATE inventory 
+                SET name = ?, quantity = ?, price = ?, category = ?, 
+                    image_filename = CASE WHEN ? THEN ? ELSE image_filename END,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = ? AND user_id = ?
+            ''', (name, quantity, price, category, replace_image, new_image,
+                  id, current_user.id)).rowcount
+            
+            # Delete the image that was replaced or removed
+            if updated and replace_image:
+                schedule_image_delete(conn, old_image)
+        
+        if updated == 0:
+            queue_image_delete(new_image)
+            flash('Item not found!', 'error')
+            return redirect(url_for('index'))
+        
+        if replace_image:
+            queue_image_delete(old_image)
         
         flash(f'Item "{name}" updated successfully!', 'success')
         return redirect(url_for('index'))
     
-    conn.close()
+    item = conn.execute(
+        'SELECT * FROM inventory WHERE id = ? AND user_id = ?', 
+        (id, current_user.id)
+    ).fetchone()
+    
+    if item is None:
+        flash('Item not found!', 'error')
+        return redirect(url_for('index'))
+    
     return render_template('edit.html', item=item)
 
 
@@ -502,26 +1085,24 @@ def delete_item(id):
     Delete inventory item route - DELETE operation.
     Also removes associated image file.
     """
-    conn = get_db_connection()
+    conn = get_db()
     item = conn.execute(
         'SELECT name, image_filename FROM inventory WHERE id = ? AND user_id = ?',
         (id, current_user.id)
     ).fetchone()
     
     if item is None:
-        conn.close()
         flash('Item not found!', 'error')
         return redirect(url_for('index'))
     
     item_name = item['name']
     
-    # Delete associated image
-    delete_image(item['image_filename'])
+    # Delete item from database and schedule its image for removal
+    with conn:
+        conn.execute('DELETE FROM inventory WHERE id = ? AND user_id = ?', (id, current_user.id))
+        schedule_image_delete(conn, item['image_filename'])
     
-    # Delete item from database
-    conn.execute('DELETE FROM inventory WHERE id = ? AND user_id = ?', (id, current_user.id))
-    conn.commit()
-    conn.close()
+    queue_image_delete(item['image_filename'])
     
     flash(f'Item "{item_name}" deleted successfully!', 'success')
     return redirect(url_for('index'))
@@ -533,12 +1114,11 @@ def view_item(id):
     """
     View single inventory item details.
     """
-    conn = get_db_connection()
+    conn = get_db()
     item = conn.execute(
         'SELECT * FROM inventory WHERE id = ? AND user_id = ?',
         (id, current_user.id)
     ).fetchone()
-    conn.close()
     
     if item is None:
         flash('Item not found!', 'error')
@@ -559,13 +1139,14 @@ def search():
     if not query:
         return redirect(url_for('index'))
     
-    conn = get_db_connection()
-    items = conn.execute('''
-        SELECT * FROM inventory 
-        WHERE user_id = ? AND (name LIKE ? OR category LIKE ?)
-        ORDER BY updated_at DESC
-    ''', (current_user.id, f'%{query}%', f'%{query}%')).fetchall()
-    conn.close()
+    cursor = get_db().cursor()
+    cursor.row_factory = list_item_factory
+    items = cursor.execute('''
+        SELECT i.id, i.name, i.quantity, i.price, i.category, i.image_filename, i.updated_at
+        FROM inventory i JOIN inventory_fts f ON f.rowid = i.id
+        WHERE i.user_id = ? AND inventory_fts MATCH ?
+        ORDER BY i.updated_at DESC
+    ''', (current_user.id, build_search_query(query))).fetchall()
     
     return render_template('search.html', items=items, query=query)
 
@@ -574,8 +1155,10 @@ def search():
 # APPLICATION ENTRY POINT
 # ============================================================================
 
-# Initialize database
+# Initialize database, backfill thumbnails and start the background image delete worker
 init_db()
+create_missing_thumbnails()
+start_image_delete_worker()
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)